@@ -1,15 +1,40 @@
-import pandas as pd
+import functools
+import json
 import os
+import re
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+# 8 MiB blocks give each pyarrow parser thread a sizeable chunk of a file
+_READ_OPTIONS = pacsv.ReadOptions(block_size=8 << 20)
 
+# Schema metadata key of the Parquet cache; bump the version whenever the way
+# the statistics are computed changes, so older cache files are recomputed
+_CACHE_METADATA_KEY = b"calc_statistics"
+_CACHE_FORMAT_VERSION = 1
+
+# The simulated period runs from 8 to 30 September 2024
+_DAYTICK_LABELS = tuple(f"{i} Sep" for i in range(8, 31))
 
 def get_statistics(
     file_name: str,
     N: int = 30,
     decimal_places: int = 2,
+    numeric_cols: list = None,
+    non_numeric_cols: list = None,
+    usecols=None,
+    max_workers: int = None,
 ) -> pd.DataFrame:
     """
     Calculate per‑day mean and standard deviation of all numeric columns
     across multiple CSV files and save the combined results.
+    The results are also cached as "{file_name}.parquet"; later calls with the
+    same arguments return the cache as long as it is newer than every input.
 
     Params
     ----------
@@ -19,6 +44,18 @@ def get_statistics(
         Number of files to aggregate.
     decimal_places : int, default 2
         Number of decimal places to round the output to.
+    numeric_cols : list, optional
+        Columns to aggregate. Inferred from the first file when not given.
+    non_numeric_cols : list, optional
+        Identifier columns copied from the first file. Inferred from the first
+        file when not given.
+    usecols : list or callable, optional
+        Columns to keep, or a predicate on the column name as in pd.read_csv.
+        Other columns are skipped by the parser and left out of the CSV and
+        Parquet files written. All columns are kept when not given.
+    max_workers : int, optional
+        Number of files read at once, which also bounds how many runs are held
+        in memory. Defaults to the number of CPUs.
 
     Returns
     -------
@@ -28,39 +65,204 @@ def get_statistics(
         "column_name (std)".
     """
 
-    first_file = pd.read_csv(f"{file_name}_1.csv")
+    if numeric_cols is None or non_numeric_cols is None:
+        first_path = f"{file_name}_1.csv"
+        inferred_numeric, inferred_non_numeric = _infer_schema(
+            first_path, os.path.getmtime(first_path)
+        )
+        numeric_cols = inferred_numeric if numeric_cols is None else numeric_cols
+        non_numeric_cols = (
+            inferred_non_numeric if non_numeric_cols is None else non_numeric_cols
+        )
+    numeric_cols = list(numeric_cols)
+    non_numeric_cols = list(non_numeric_cols)
+    if usecols is not None:
+        keep = usecols if callable(usecols) else set(usecols).__contains__
+        numeric_cols = [col for col in numeric_cols if keep(col)]
+        non_numeric_cols = [col for col in non_numeric_cols if keep(col)]
 
-    numeric_cols = first_file.select_dtypes(include="number").columns
-    non_numeric_cols = first_file.select_dtypes(exclude="number").columns
+    paths = [f"{file_name}_{i}.csv" for i in range(1, N + 1)]
+    result_columns = (
+        non_numeric_cols + numeric_cols + [f"{col} (std)" for col in numeric_cols]
+    )
+    cached_df = _read_cached_statistics(
+        f"{file_name}.parquet", paths, result_columns, N, decimal_places
+    )
+    if cached_df is not None:
+        return cached_df
 
-    sum_df = first_file[numeric_cols].copy()
-    sq_sum_df = first_file[numeric_cols].pow(2)
+    # Numeric columns are parsed straight to float32 to halve the bytes moved by
+    # the reduction; the rest stay strings so they match what pd.read_csv returns
+    convert_options = pacsv.ConvertOptions(
+        column_types={
+            **{col: pa.float32() for col in numeric_cols},
+            **{col: pa.string() for col in non_numeric_cols},
+        },
+        include_columns=non_numeric_cols + numeric_cols,
+    )
+
+    def _read(i: int) -> pd.DataFrame:
+        return pacsv.read_csv(
+            paths[i - 1],
+            read_options=_READ_OPTIONS,
+            convert_options=convert_options,
+        ).to_pandas(self_destruct=True, split_blocks=True)
 
-    for i in range(2, N + 1):
-        df = pd.read_csv(f"{file_name}_{i}.csv")
-        sum_df += df[numeric_cols]
-        sq_sum_df += df[numeric_cols].pow(2)
+    workers = max_workers or os.cpu_count() or 1
+    n = 0
 
-    mean_df = sum_df / N
-    var_df = (sq_sum_df / N) - mean_df.pow(2)
-    std_df = var_df.clip(lower=0).pow(0.5)
+    # pyarrow parses in C++ and releases the GIL, so threads read files concurrently.
+    # At most `workers` files are held at once; each is folded into the running
+    # mean/M2 as soon as it arrives, so memory does not grow with N.
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for start in range(1, N + 1, workers):
+            batch = range(start, min(start + workers, N + 1))
+            for df in executor.map(_read, batch):
+                if n == 0:
+                    identifiers = df[non_numeric_cols]
+                    mean = np.zeros((len(df), len(numeric_cols)), dtype=np.float64)
+                    M2 = np.zeros_like(mean)
 
-    mean_df = mean_df.round(decimal_places)
-    std_df = std_df.round(decimal_places)
+                n += 1
+                _welford_update(
+                    mean,
+                    M2,
+                    df[numeric_cols].to_numpy(dtype=np.float32, copy=False),
+                    n,
+                )
 
-    std_df.columns = [f"{col} (std)" for col in std_df.columns]
+    mean = np.round(mean, decimal_places)
+    std = np.round(np.sqrt(M2 / n), decimal_places)
 
-    result_df = pd.concat(
-        [first_file[non_numeric_cols].reset_index(drop=True), mean_df, std_df],
-        axis=1,
+    # Mean and std go in as one block sharing the identifiers' index, so the
+    # result is not fragmented into one block per column
+    stats = pd.DataFrame(
+        np.hstack([mean, std]),
+        columns=numeric_cols + [f"{col} (std)" for col in numeric_cols],
+        index=identifiers.index,
     )
+    result_df = pd.concat([identifiers, stats], axis=1)
 
     assert isinstance(result_df, pd.DataFrame), "Result is not a DataFrame"
 
+    table = pa.Table.from_pandas(result_df, preserve_index=False)
+    table = table.replace_schema_metadata(
+        {
+            **table.schema.metadata,
+            _CACHE_METADATA_KEY: _cache_key(N, decimal_places),
+        }
+    )
+    pq.write_table(table, f"{file_name}.parquet")
     result_df.to_csv(f"{file_name}.csv", index=False)
     return result_df
 
 
+def _cache_key(N: int, decimal_places: int) -> bytes:
+    """
+    Build the key stored in the schema metadata of the Parquet cache.
+
+    Params
+    ------
+    - N (int): The number of files aggregated.
+    - decimal_places (int): The number of decimal places the output is rounded to.
+
+    Returns
+    -------
+    - key (bytes): The format version and arguments the statistics were made with.
+    """
+    return json.dumps(
+        {"version": _CACHE_FORMAT_VERSION, "N": N, "decimal_places": decimal_places},
+        sort_keys=True,
+    ).encode()
+
+
+def _read_cached_statistics(
+    cache_path: str,
+    paths: list,
+    result_columns: list,
+    N: int,
+    decimal_places: int,
+) -> pd.DataFrame:
+    """
+    Read previously aggregated statistics from the Parquet cache.
+
+    Params
+    ------
+    - cache_path (str): The path to the Parquet cache file.
+    - paths (list): The paths to the CSV files the statistics are computed from.
+    - result_columns (list): The columns the statistics are expected to have.
+    - N (int): The number of files aggregated.
+    - decimal_places (int): The number of decimal places the output is rounded to.
+
+    Returns
+    -------
+    - cached_df (pd.DataFrame): The cached statistics, or None when there is no
+    cache or it is older than any of the inputs or was made with other arguments
+    or another cache format version.
+    """
+    if not os.path.exists(cache_path):
+        return None
+    if os.path.getmtime(cache_path) < max(os.path.getmtime(path) for path in paths):
+        return None
+
+    metadata = pq.read_schema(cache_path).metadata or {}
+    if metadata.get(_CACHE_METADATA_KEY) != _cache_key(N, decimal_places):
+        return None
+
+    cached_df = pd.read_parquet(cache_path)
+    if list(cached_df.columns) != result_columns:
+        return None
+    return cached_df
+
+
+@functools.lru_cache(maxsize=None)
+def _infer_schema(path: str, mtime: float) -> tuple:
+    """
+    Split the columns of a simulation CSV into numeric and non-numeric ones.
+    Only the first block of the file is parsed. Results are cached per path and
+    modification time, so repeated calls on an unchanged file are free.
+
+    Params
+    ------
+    - path (str): The path to the CSV file.
+    - mtime (float): The modification time of the file, used as cache key.
+
+    Returns
+    -------
+    - numeric_cols (tuple): The names of the numeric columns.
+    - non_numeric_cols (tuple): The names of the remaining columns.
+    """
+    with pacsv.open_csv(path, read_options=_READ_OPTIONS) as reader:
+        schema = reader.schema
+
+    numeric_cols = tuple(
+        field.name
+        for field in schema
+        if pa.types.is_integer(field.type) or pa.types.is_floating(field.type)
+    )
+    non_numeric_cols = tuple(
+        field.name for field in schema if field.name not in numeric_cols
+    )
+    return numeric_cols, non_numeric_cols
+
+
+def _welford_update(mean: np.ndarray, M2: np.ndarray, x: np.ndarray, n: int) -> None:
+    """
+    Fold one sample into the running mean and sum of squared deviations in place,
+    following Welford's online algorithm.
+
+    Params
+    ------
+    - mean (np.ndarray): The running mean, updated in place.
+    - M2 (np.ndarray): The running sum of squared deviations, updated in place.
+    - x (np.ndarray): The new sample, with the same shape as mean.
+    - n (int): The number of samples seen including x.
+    """
+    delta = x - mean
+    mean += delta / n
+    M2 += delta * (x - mean)
+
+
 def get_sim_df(import_file: str = "simulation_results/") -> tuple:
     """
     Get the simulation DataFrame by aggregating results from multiple CSV files.
@@ -76,13 +278,26 @@ def get_sim_df(import_file: str = "simulation_results/") -> tuple:
     - df_lesshubs (pd.DataFrame): DataFrame with statistics for simulations with fewer hubs.
     - df_lessshelters (pd.DataFrame): DataFrame with statistics for simulations
     """
-    files = os.listdir(import_file)
+    files = [f for f in os.listdir(import_file) if re.fullmatch(r".+_\d+\.csv", f)]
     print(f"Amount of simulation runs: {len(files)}")
 
-    df_5000 = get_statistics(file_name=import_file + "5000")
-    df_12000 = get_statistics(file_name=import_file + "12000")
-    df_lesshubs = get_statistics(file_name=import_file + "lesshubs")
-    df_lessshelters = get_statistics(file_name=import_file + "lessshelter")
+    # The scenarios touch disjoint files, so each is aggregated in its own process.
+    # The CPUs are split between the processes, so they do not each start a full
+    # set of reader threads and hold that many runs in memory
+    scenarios = ["5000", "12000", "lesshubs", "lessshelter"]
+    workers_per_scenario = max(1, (os.cpu_count() or 1) // len(scenarios))
+    with ProcessPoolExecutor(max_workers=len(scenarios)) as executor:
+        futures = [
+            executor.submit(
+                get_statistics,
+                file_name=import_file + scenario,
+                max_workers=workers_per_scenario,
+            )
+            for scenario in scenarios
+        ]
+        df_5000, df_12000, df_lesshubs, df_lessshelters = [
+            future.result() for future in futures
+        ]
 
     return df_5000, df_12000, df_lesshubs, df_lessshelters
 
@@ -98,8 +313,7 @@ def get_sim_dates(df: pd.DataFrame) -> tuple:
     Returns
     -------
     - days (list): List of dates from the "Date" column.
-    - daytick_labels (list): List of formatted date labels for the x-axis ticks.
+    - daytick_labels (tuple): Formatted date labels for the x-axis ticks.
     """
     days = df["Date"]
-    daytick_labels = [f"{i} Sep" for i in range(8, 31)]
-    return days, daytick_labels
+    return days, _DAYTICK_LABELS
@@ -0,0 +1,18 @@
+import io
+
+
+def save_figure(fig, path: str, dpi: int, bbox_inches: str = None) -> None:
+    """
+    Render a figure to PNG in memory and write it to disk in a single write.
+
+    Params:
+    ---------
+    - fig (matplotlib.figure.Figure): Figure to save.
+    - path (str): Path of the PNG file.
+    - dpi (int): Resolution of the PNG file.
+    - bbox_inches (str): Bounding box passed to savefig, e.g. "tight". Default is None.
+    """
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", dpi=dpi, bbox_inches=bbox_inches)
+    with open(path, "wb") as f:
+        f.write(buf.getbuffer())
@@ -1,13 +1,24 @@
+import re
+
 import contextily as ctx
 import geopandas as gpd
 import matplotlib
 import matplotlib.patheffects as path_effects
 import matplotlib.pyplot as plt
-from shapely.geometry import LineString
+import numpy as np
+import pandas as pd
+import shapely
+from pyproj import Transformer
 from src.get_files import get_locations, get_routes
 
 plt.style.use("bmh")
 
+# Keep downloaded tiles on disk so repeated plots skip the tile servers
+ctx.set_cache_dir(".tile_cache")
+BASEMAP_SOURCE = ctx.providers.OpenStreetMap.Mapnik
+TO_WEB_MERCATOR = Transformer.from_crs(4326, 3857, always_xy=True)
+MYANMAR_RE = re.compile(r"Myanmar|Burma", re.IGNORECASE)
+
 
 def create_locations_gdf(locations_df) -> tuple:
     """
@@ -20,16 +31,15 @@ def create_locations_gdf(locations_df) -> tuple:
     Returns
     -------
     - location_gdf (gpd.GeoDataFrame): The locations GeoDataFrame
-    - location_dict (dict): A dictionary mapping location names to their coordinates
     - location_type_colors (dict): A dictionary mapping location types to colors
     """
+    xs, ys = TO_WEB_MERCATOR.transform(
+        locations_df["longitude"].to_numpy(dtype=np.float64),
+        locations_df["latitude"].to_numpy(dtype=np.float64),
+    )
     locations_gdf = gpd.GeoDataFrame(
-        locations_df,
-        geometry=gpd.points_from_xy(locations_df.longitude, locations_df.latitude),
+        locations_df, geometry=gpd.points_from_xy(xs, ys, crs=3857)
     )
-    locations_gdf.set_crs(epsg=4326, inplace=True)
-    location_dict = locations_gdf.set_index("#name")["geometry"].to_dict()
-    locations_gdf = locations_gdf.to_crs(epsg=3857)
     locations_gdf["location_type"] = locations_gdf["location_type"] + "s"
 
     location_type_colors = {
@@ -38,47 +48,117 @@ def create_locations_gdf(locations_df) -> tuple:
         "camps": "green",
         "temples": "purple",
     }
-    locations_gdf["color"] = locations_gdf["location_type"].map(location_type_colors)
     # Overrite the camp location to display them as temples
-    locations_gdf.loc[
-        locations_gdf["#name"].str.contains("temple", case=False, na=False), "color"
-    ] = location_type_colors["temples"]
+    names = np.char.lower(locations_gdf["#name"].to_numpy().astype(str))
+    is_temple = np.char.find(names, "temple") >= 0
+    locations_gdf["color"] = np.where(
+        is_temple,
+        location_type_colors["temples"],
+        locations_gdf["location_type"].map(location_type_colors).to_numpy(),
+    )
 
-    return locations_gdf, location_dict, location_type_colors
+    return locations_gdf, location_type_colors
 
 
-def create_edges_gdf(location_dict, edges_df) -> gpd.GeoDataFrame:
+def create_edges_gdf(locations_gdf, edges_df) -> gpd.GeoDataFrame:
     """
     Create a GeoDataFrame from the edges DataFrame
+    Edges with an endpoint that is not in the locations GeoDataFrame are dropped.
 
     Params
     ------
-    - location_dict (dict): A dictionary mapping location names to their coordinates
+    - locations_gdf (gpd.GeoDataFrame): The locations GeoDataFrame in EPSG:3857
     - edges_df (pd.DataFrame): The edges DataFrame
 
     Returns
     -------
     - edges_gdf (gpd.GeoDataFrame): The edges GeoDataFrame
     """
-    lines = [
-        LineString([location_dict[row["location_1"]], location_dict[row["location_2"]]])
-        for _, row in edges_df.iterrows()
-        if row["location_1"] in location_dict and row["location_2"] in location_dict
-    ]
-    edges_gdf = gpd.GeoDataFrame(geometry=lines)
-    edges_gdf.set_crs(epsg=4326, inplace=True)
-    edges_gdf = edges_gdf.to_crs(epsg=3857)
+    # The locations are already projected, so the edges are built in EPSG:3857
+    coords = shapely.get_coordinates(locations_gdf.geometry.values)
+    names = pd.Index(locations_gdf["#name"])
+    # The last location wins when a name is listed more than once
+    keep = ~names.duplicated(keep="last")
+    coords = coords[keep]
+    names = names[keep]
+    idx_1 = names.get_indexer(edges_df["location_1"])
+    idx_2 = names.get_indexer(edges_df["location_2"])
+    known = (idx_1 >= 0) & (idx_2 >= 0)
+
+    segments = np.stack([coords[idx_1[known]], coords[idx_2[known]]], axis=1)
+    edges_gdf = gpd.GeoDataFrame(geometry=shapely.linestrings(segments), crs=3857)
 
     return edges_gdf
 
 
+def _legend_elements(
+    locations_gdf: gpd.GeoDataFrame, location_type_colors: dict
+) -> list:
+    """
+    Create the legend handles for the location types, labelled with their counts
+
+    Params
+    ------
+    - locations_gdf (gpd.GeoDataFrame): The locations GeoDataFrame
+    - location_type_colors (dict): A dictionary mapping location types to colors
+
+    Returns
+    -------
+    - legend_elements (list): The legend handles, one per location type
+    """
+    colors = locations_gdf["color"].astype("category")
+    counts = np.bincount(colors.cat.codes, minlength=len(colors.cat.categories))
+    location_counts = dict(zip(colors.cat.categories, counts))
+
+    return [
+        plt.Line2D(
+            [0],
+            [0],
+            marker="o",
+            color="w",
+            label=f"{loc_type} ({location_counts.get(color, 0)})",
+            markerfacecolor=color,
+            markersize=10,
+        )
+        for loc_type, color in location_type_colors.items()
+    ]
+
+
+def _add_basemap(ax: matplotlib.axes.Axes, basemap: tuple = None) -> tuple:
+    """
+    Add the OpenStreetMap basemap behind the current view of the axis.
+
+    Params
+    ------
+    - ax (matplotlib.axes.Axes): The axis to add the basemap to, in EPSG:3857
+    - basemap (tuple): A previously fetched (image, extent) pair covering the same
+    view. The tiles are fetched for the current view when not given.
+
+    Returns
+    -------
+    - basemap (tuple): The (image, extent) pair, to reuse for a plot with the same view
+    """
+    xmin, xmax, ymin, ymax = ax.axis()
+    if basemap is None:
+        basemap = ctx.bounds2img(
+            xmin, ymin, xmax, ymax, source=BASEMAP_SOURCE, ll=False
+        )
+
+    image, extent = basemap
+    ax.imshow(image, extent=extent, interpolation="bilinear", aspect=ax.get_aspect())
+    ax.axis((xmin, xmax, ymin, ymax))
+    ctx.add_attribution(ax, BASEMAP_SOURCE.get("attribution"))
+    return basemap
+
+
 def plot_route(
     edges_gdf: gpd.GeoDataFrame,
     locations_gdf: gpd.GeoDataFrame,
     location_type_colors: dict,
     FIG_DPI: int,
     FIG_SIZE: tuple,
-) -> None:
+    basemap: tuple = None,
+) -> tuple:
     """
     Plot the fleeing routes around the given locations
 
@@ -89,8 +169,12 @@ def plot_route(
     - location_type_colors (dict): A dictionary mapping location types to colors
     - FIG_DPI (int): The DPI for the figure
     - FIG_SIZE (tuple): The size of the figure
+    - basemap (tuple): A previously fetched (image, extent) basemap to reuse
+
+    Returns
+    -------
+    - basemap (tuple): The (image, extent) basemap drawn behind the routes
     """
-    location_counts = locations_gdf["color"].value_counts().to_dict()
     _, ax = plt.subplots(figsize=FIG_SIZE, dpi=FIG_DPI)
 
     edges_gdf.plot(ax=ax, color="black", linewidth=1, label="Edges")
@@ -98,29 +182,19 @@ def plot_route(
         ax=ax, c=locations_gdf["color"], markersize=50, label="Locations"
     )
 
-    ctx.add_basemap(ax, source=ctx.providers.OpenStreetMap.Mapnik)
+    basemap = _add_basemap(ax, basemap)
 
     ax.xaxis.set_visible(False)
     ax.yaxis.set_visible(False)
 
-    legend_elements = [
-        plt.Line2D(
-            [0],
-            [0],
-            marker="o",
-            color="w",
-            label=f"{loc_type} ({location_counts[color]})",
-            markerfacecolor=color,
-            markersize=10,
-        )
-        for loc_type, color in location_type_colors.items()
-    ]
+    legend_elements = _legend_elements(locations_gdf, location_type_colors)
     ax.legend(handles=legend_elements, title="Location Type")
 
     plt.title("Fleeing Routes around the Sittaung River, Taungoo Township Myanmar")
     plt.tight_layout()
     plt.savefig("plots/route_plot.png", dpi=300)
     plt.show()
+    return basemap
 
 
 def plot_map(
@@ -128,7 +202,8 @@ def plot_map(
     location_type_colors: dict,
     FIG_DPI: int,
     FIG_SIZE: tuple,
-) -> None:
+    basemap: tuple = None,
+) -> tuple:
     """
     Plot the locations on a map with their respective colors
 
@@ -138,57 +213,54 @@ def plot_map(
     - location_type_colors (dict): A dictionary mapping location types to colors
     - FIG_DPI (int): The DPI for the figure
     - FIG_SIZE (tuple): The size of the figure
+    - basemap (tuple): A previously fetched (image, extent) basemap to reuse
+
+    Returns
+    -------
+    - basemap (tuple): The (image, extent) basemap drawn behind the locations
     """
-    location_counts = locations_gdf["color"].value_counts().to_dict()
     _, ax = plt.subplots(figsize=FIG_SIZE, dpi=FIG_DPI)
     locations_gdf.plot(ax=ax, c=locations_gdf["color"], markersize=50)
 
-    ctx.add_basemap(ax, source=ctx.providers.OpenStreetMap.Mapnik)
+    basemap = _add_basemap(ax, basemap)
 
     ax.xaxis.set_visible(False)
     ax.yaxis.set_visible(False)
 
     text_nudge = 10
-    for idx, row in locations_gdf.iterrows():
-        text = ax.text(
-            row.geometry.x,
-            row.geometry.y + text_nudge
-            if idx % 2 == 0
-            else row.geometry.y - text_nudge,
-            row["#name"],
+    xs = locations_gdf.geometry.x.to_numpy()
+    # Alternate labels above and below their marker to reduce overlap
+    ys = locations_gdf.geometry.y.to_numpy() + np.where(
+        locations_gdf.index.to_numpy() % 2 == 0, text_nudge, -text_nudge
+    )
+    names = locations_gdf["#name"].to_numpy()
+    label_effects = [
+        path_effects.Stroke(linewidth=1.5, foreground="black"),
+        path_effects.Normal(),
+    ]
+
+    for x, y, name in zip(xs, ys, names):
+        ax.text(
+            x,
+            y,
+            name,
             fontsize=8,
             ha="center",
             va="center",
             color="white",
             weight="bold",
             zorder=5,
+            path_effects=label_effects,
         )
 
-        text.set_path_effects(
-            [
-                path_effects.Stroke(linewidth=1.5, foreground="black"),
-                path_effects.Normal(),
-            ]
-        )
-
-    legend_elements = [
-        plt.Line2D(
-            [0],
-            [0],
-            marker="o",
-            color="w",
-            label=f"{loc_type} ({location_counts[color]})",
-            markerfacecolor=color,
-            markersize=10,
-        )
-        for loc_type, color in location_type_colors.items()
-    ]
+    legend_elements = _legend_elements(locations_gdf, location_type_colors)
     ax.legend(handles=legend_elements, title="Location Type")
 
     plt.title("Locations around the Sittaung River, Taungoo Township Myanmar")
     plt.tight_layout()
     plt.savefig("plots/locations_map.png", dpi=300)
     plt.show()
+    return basemap
 
 
 def add_scale_bar(ax: matplotlib.axes.Axes, length_km: float, location: str) -> None:
@@ -286,22 +358,19 @@ def plot_context_map() -> None:
 
     regional_countries.plot(ax=ax1, color="lightgray", edgecolor="black", linewidth=0.5)
     country_columns = ["name", "NAME", "country", "COUNTRY", "NAME_EN", "admin"]
-    myanmar_country = None
-
-    for col in country_columns:
-        if col in regional_countries.columns:
-            myanmar_country = regional_countries[
-                regional_countries[col].str.contains(
-                    "Myanmar|Burma", case=False, na=False
-                )
-            ]
-            if not myanmar_country.empty:
-                break
-
-    if myanmar_country is not None and not myanmar_country.empty:
-        myanmar_country.plot(
-            ax=ax1, color="lightblue", edgecolor="black", linewidth=1.0
-        )
+    available_columns = set(regional_countries.columns)
+    country_col = next(
+        (col for col in country_columns if col in available_columns), None
+    )
+
+    if country_col is not None:
+        myanmar_country = regional_countries[
+            regional_countries[country_col].str.contains(MYANMAR_RE, na=False)
+        ]
+        if not myanmar_country.empty:
+            myanmar_country.plot(
+                ax=ax1, color="lightblue", edgecolor="black", linewidth=1.0
+            )
 
     _axis1_plot(ax1, LON, LAT, MYANMAR_REGION_BOUNDS)
     _axis2_plot(ax2, taungoo_area, buffered_bounds, LON, LAT)
@@ -361,6 +430,8 @@ def _axis2_plot(
 
     ax2.set_xlim(buffered_bounds[0], buffered_bounds[2])
     ax2.set_ylim(buffered_bounds[1], buffered_bounds[3])
+    # Keep the basemap and township outline from changing the view
+    ax2.set_autoscale_on(False)
 
     try:
         ctx.add_basemap(
@@ -390,8 +461,6 @@ def _axis2_plot(
         bbox=dict(boxstyle="round,pad=0.3", facecolor="white", alpha=0.9),
     )
 
-    ax2.set_xlim(buffered_bounds[0], buffered_bounds[2])
-    ax2.set_ylim(buffered_bounds[1], buffered_bounds[3])
     add_scale_bar(ax2, 10, "lower right")
 
 
@@ -407,12 +476,13 @@ def create_route_plot(FIG_DPI: int, FIG_SIZE: tuple, PATH: str) -> None:
     """
     locations_df = get_locations(PATH)
     edges_df = get_routes(PATH)
-    locations_gdf, location_dict, location_type_colors = create_locations_gdf(
-        locations_df
+    locations_gdf, location_type_colors = create_locations_gdf(locations_df)
+    edges_gdf = create_edges_gdf(locations_gdf, edges_df)
+    # Both maps show the same locations, so the tiles are fetched only once
+    basemap = plot_route(
+        edges_gdf, locations_gdf, location_type_colors, FIG_DPI, FIG_SIZE
     )
-    edges_gdf = create_edges_gdf(location_dict, edges_df)
-    plot_route(edges_gdf, locations_gdf, location_type_colors, FIG_DPI, FIG_SIZE)
-    plot_map(locations_gdf, location_type_colors, FIG_DPI, FIG_SIZE)
+    plot_map(locations_gdf, location_type_colors, FIG_DPI, FIG_SIZE, basemap)
 
 
 if __name__ == "__main__":
@@ -1,9 +1,42 @@
+import functools
+import hashlib
+import inspect
 import math
+import os
+import shutil
+import sys
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib as mpl
+
+# Render straight to PNG on headless machines unless the caller picked a backend
+if (
+    sys.platform.startswith("linux")
+    and "MPLBACKEND" not in os.environ
+    and not os.environ.get("DISPLAY")
+    and not os.environ.get("WAYLAND_DISPLAY")
+):
+    mpl.use("Agg")
 
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 import seaborn as sns
+from matplotlib.figure import SubplotParams
+
+from script.figure_io import save_figure
+
+# Path rendering settings for the result plots. They are applied with mpl.rc_context
+# around each plotting function only, so importing this module leaves the global
+# rcParams, and every other figure, untouched.
+_RENDER_RC = {
+    "path.simplify": True,
+    "path.simplify_threshold": 1.0,
+    "agg.path.chunksize": 10000,
+}
+
+_PLOT_CACHE_MAX_ENTRIES = 64
 
 
 def _create_file_path(
@@ -39,6 +72,249 @@ def _create_file_path(
     return path
 
 
+def _prepare_figure(fig, figsize: tuple, layout: str = "none") -> tuple:
+    """
+    Clear a figure passed in for reuse, or create a new one.
+
+    Params:
+    ---------
+    - fig (matplotlib.figure.Figure): Figure to reuse, or None.
+    - figsize (tuple): Size of the figure to create when fig is None.
+    - layout (str): Layout engine of the figure. Default is "none".
+
+    Returns:
+    ---------
+    - fig (matplotlib.figure.Figure): Figure to draw on.
+    - owns_fig (bool): Whether the figure was created here and should be closed after saving.
+    """
+    if fig is None:
+        return plt.figure(figsize=figsize, layout=layout), True
+    # Sharing a log-scaled y-axis makes clearing warn about the reset limits
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", UserWarning)
+        fig.clear()
+    # Margins left behind by an earlier tight_layout would shift the next plot
+    fig.subplotpars = SubplotParams()
+    fig.set_layout_engine(layout)
+    return fig, False
+
+
+def _hash_value(hasher, value) -> None:
+    """
+    Feed a plotting argument into a running hash.
+
+    Params:
+    ---------
+    - hasher (hashlib.blake2b): Hash object to update.
+    - value: Argument value; DataFrames, Series, arrays and sequences are hashed by content.
+    """
+    if isinstance(value, pd.DataFrame):
+        hasher.update(repr(list(value.columns)).encode())
+        hasher.update(
+            pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes()
+        )
+    elif isinstance(value, pd.Series):
+        hasher.update(repr(value.name).encode())
+        hasher.update(
+            pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes()
+        )
+    elif isinstance(value, np.ndarray):
+        hasher.update(f"{value.dtype}{value.shape}".encode())
+        hasher.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, (list, tuple)):
+        hasher.update(f"{type(value).__name__}{len(value)}".encode())
+        for item in value:
+            _hash_value(hasher, item)
+    else:
+        hasher.update(repr(value).encode())
+
+
+def _code_version(func) -> str:
+    """
+    Fingerprint the code and libraries a plotting function renders with.
+
+    Params:
+    ---------
+    - func (callable): The plotting function.
+
+    Returns:
+    ---------
+    - version (str): Hex digest over the source of the function's module, falling back to
+      the function's bytecode and constants, and the matplotlib, seaborn and numpy versions.
+    """
+    hasher = hashlib.blake2b(digest_size=8)
+    try:
+        # The whole module, so edits to shared helpers also invalidate the cache
+        hasher.update(inspect.getsource(inspect.getmodule(func)).encode())
+    except (OSError, TypeError):
+        hasher.update(func.__code__.co_code)
+        hasher.update(repr(func.__code__.co_consts).encode())
+    for version in (mpl.__version__, sns.__version__, np.__version__):
+        hasher.update(version.encode())
+    return hasher.hexdigest()
+
+
+def _evict_cache_entries(cache_dir: str, max_entries: int) -> None:
+    """
+    Remove the least recently used cached plots beyond max_entries.
+
+    Params:
+    ---------
+    - cache_dir (str): Cache directory of the current version.
+    - max_entries (int): Number of cached plots to keep.
+    """
+    with os.scandir(cache_dir) as entries:
+        cached = [(entry.stat().st_mtime, entry.path) for entry in entries]
+    if len(cached) <= max_entries:
+        return
+    cached.sort(reverse=True)
+    for _, stale_path in cached[max_entries:]:
+        try:
+            os.remove(stale_path)
+        except FileNotFoundError:
+            pass
+
+
+def clear_plot_cache(results_dir: str) -> None:
+    """
+    Remove all cached plots of a results directory.
+
+    Params:
+    ---------
+    - results_dir (str): Directory the plots are saved to.
+    """
+    shutil.rmtree(os.path.join(results_dir, ".cache"), ignore_errors=True)
+
+
+def plot_cache(path_fn, max_entries: int = _PLOT_CACHE_MAX_ENTRIES):
+    """
+    Reuse a previously rendered PNG when a plotting function is called with unchanged inputs.
+    Rendered plots are kept as "<results_dir>/.cache/<version>/<hash>.png", where the version
+    covers the plotting code and library versions and the hash the function name, its
+    arguments and the active rcParams. Hits are copied to the requested path. When a new plot
+    is cached, entries of other versions are removed and only the max_entries most recently
+    used entries of the current version are kept.
+    Calls with show_plot=True or a figure to draw on always render.
+
+    Params:
+    ---------
+    - path_fn (callable): Path helper the plotting function saves with. It is called with the
+      arguments of the call whose names match its parameters.
+    - max_entries (int): Number of cached plots kept per results directory. Default is 64.
+
+    Returns:
+    ---------
+    - decorator (callable): Decorator applying the cache to a plotting function.
+    """
+
+    def decorator(func):
+        signature = inspect.signature(func)
+        path_params = list(inspect.signature(path_fn).parameters)
+        version = _code_version(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            params = bound.arguments
+            if params["show_plot"] or params["fig"] is not None:
+                return func(*args, **kwargs)
+
+            hasher = hashlib.blake2b(func.__qualname__.encode(), digest_size=16)
+            for key, value in params.items():
+                hasher.update(key.encode())
+                _hash_value(hasher, value)
+            hasher.update(repr(sorted(mpl.rcParams.items())).encode())
+
+            path = path_fn(**{name: params[name] for name in path_params})
+            cache_root = os.path.join(params["results_dir"], ".cache")
+            cache_dir = os.path.join(cache_root, version)
+            cached_path = os.path.join(cache_dir, f"{hasher.hexdigest()}.png")
+            if os.path.exists(cached_path):
+                shutil.copyfile(cached_path, path)
+                # Mark the entry as recently used so eviction keeps it
+                os.utime(cached_path)
+                return None
+
+            result = func(*args, **kwargs)
+            os.makedirs(cache_dir, exist_ok=True)
+            with os.scandir(cache_root) as entries:
+                stale = [entry.path for entry in entries if entry.name != version]
+            for stale_path in stale:
+                if os.path.isdir(stale_path):
+                    shutil.rmtree(stale_path, ignore_errors=True)
+                else:
+                    os.remove(stale_path)
+            shutil.copyfile(path, cached_path)
+            _evict_cache_entries(cache_dir, max_entries)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def _error_heatmap_file_path(
+    normalize: bool, show_values: bool, subtitle: str, results_dir: str
+) -> str:
+    """
+    Create the file path for an error heatmap.
+
+    Params:
+    ---------
+    - normalize (bool): Whether the plot is normalized.
+    - show_values (bool): Whether to show values in the plot.
+    - subtitle (str): Subtitle for the plot, used in the filename.
+    - results_dir (str): Directory where the plot will be saved.
+
+    Returns:
+    ---------
+    - path (str): Full path to the file where the plot will be saved.
+    """
+    return _create_file_path(
+        "error_heatmap",
+        normalize=normalize,
+        show_values=show_values,
+        subtitle=subtitle,
+        results_dir=results_dir,
+    )
+
+
+def _displacement_file_path(refugee_series: list, name: str, results_dir: str) -> str:
+    """
+    Create the file path for a displacement over time plot.
+
+    Params:
+    ---------
+    - refugee_series (list of lists): Series in the plot, counted when no name is given.
+    - name (str): Name for the plot file, or None.
+    - results_dir (str): Directory where the plot will be saved.
+
+    Returns:
+    ---------
+    - path (str): Full path to the file where the plot will be saved.
+    """
+    return f"{results_dir}/displacement_over_time_{name or len(refugee_series)}.png"
+
+
+def _camp_file_path(is_camp: bool, results_dir: str) -> str:
+    """
+    Create the file path for a camp displacement plot.
+
+    Params:
+    ---------
+    - is_camp (bool): Whether the plot is per camp or per temple.
+    - results_dir (str): Directory where the plot will be saved.
+
+    Returns:
+    ---------
+    - path (str): Full path to the file where the plot will be saved.
+    """
+    return f"{results_dir}/camp_over_time_{is_camp}.png"
+
+
+@plot_cache(_error_heatmap_file_path)
+@mpl.rc_context(_RENDER_RC)
 def error_matrix(
     df,
     daytick_labels,
@@ -47,6 +323,10 @@ def error_matrix(
     show_values=False,
     show_plot=False,
     results_dir="plots",
+    max_cols=512,
+    max_annot_cells=2000,
+    dpi=150,
+    fig=None,
 ) -> None:
     """
     Create a heatmap of errors from the DataFrame.
@@ -60,68 +340,102 @@ def error_matrix(
     - show_values (bool): Whether to display values in the heatmap cells. Default is False.
     - show_plot (bool): Whether to display the plot immediately. Default is False.
     - results_dir (str): Directory to save the heatmap PNG file. Default is "plots".
+    - max_cols (int): Maximum number of date columns drawn without annotations; longer
+      series are averaged into bins. Default is 512.
+    - max_annot_cells (int): Largest heatmap, in cells, that show_values annotates. Default is 2000.
+    - dpi (int): Resolution of the saved PNG file. Default is 150.
+    - fig (matplotlib.figure.Figure): Figure to draw on, cleared first so one figure can be
+      reused across calls. A new figure is created and closed when None. Default is None.
 
     Returns:
     ---------
     - None: Displays the heatmap and saves it as a PNG file.
     """
 
-    error_cols = [
-        col
-        for col in df.columns
-        if "error" in col.lower()
-        and "total" not in col.lower()
-        and "std" not in col.lower()
-    ]
-    error_data = df[error_cols].copy()
-    error_data.index = pd.to_datetime(df["Date"])
-    error_data.columns = error_data.columns.str.replace(" error", "")
-
-    error_data_T = error_data.T
-    max_val = error_data_T.max().max()
+    cols = df.columns.str.lower()
+    mask = (
+        cols.str.contains("error", regex=False)
+        & ~cols.str.contains("total", regex=False)
+        & ~cols.str.contains("std", regex=False)
+    )
+    error_cols = df.columns[mask]
+    error_arr = df[error_cols].to_numpy(dtype=np.float64, copy=False)
+    max_val = np.nanmax(error_arr)
     if normalize and max_val != 0:
-        error_data_T = error_data_T / max_val
-
-    plt.figure(figsize=(16, 8))
-    heatmap = sns.heatmap(
-        error_data_T,
-        cmap="plasma",
-        annot=show_values,
-        fmt=".2f" if show_values else "",
-        cbar_kws={
-            "label": "Normalized Error Magnitude" if normalize else "Error Magnitude"
-        },
-        linewidths=0.01,
+        error_arr = error_arr / max_val
+
+    # Simulation results store dates as "YYYY-MM-DD" strings; parse them only when needed
+    dates = df["Date"]
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates, format="%Y-%m-%d", cache=True)
+
+    error_data_T = pd.DataFrame(
+        error_arr.T,
+        index=error_cols.str.replace(" error", ""),
+        columns=dates,
     )
 
+    cbar_label = "Normalized Error Magnitude" if normalize else "Error Magnitude"
+
+    fig, owns_fig = _prepare_figure(fig, figsize=(16, 8), layout="constrained")
+    heatmap = fig.add_subplot()
+    if show_values and error_data_T.size <= max_annot_cells:
+        sns.heatmap(
+            error_data_T,
+            ax=heatmap,
+            cmap="plasma",
+            annot=True,
+            fmt=".2f",
+            cbar_kws={"label": cbar_label},
+        )
+    else:
+        # Without annotations the cells are drawn as one image, averaging dates into
+        # bins once there are more than max_cols of them
+        arr = error_data_T.to_numpy()
+        n_rows, n_cols = arr.shape
+        k = math.ceil(n_cols / max_cols)
+        if k > 1:
+            n_bins = math.ceil(n_cols / k)
+            padded = np.full((n_rows, n_bins * k), np.nan)
+            padded[:, :n_cols] = arr
+            arr = np.nanmean(padded.reshape(n_rows, n_bins, k), axis=2)
+        image = heatmap.imshow(
+            arr,
+            cmap="plasma",
+            aspect="auto",
+            interpolation="nearest",
+            extent=(0, arr.shape[1] * k, n_rows, 0),
+        )
+        heatmap.set_xlim(0, n_cols)
+        heatmap.set_yticks(np.arange(n_rows) + 0.5)
+        heatmap.set_yticklabels(error_data_T.index, rotation=0)
+        heatmap.spines[:].set_visible(False)
+        fig.colorbar(image, ax=heatmap, label=cbar_label)
+
     heatmap.set_xticks(np.arange(len(daytick_labels)) + 0.5)
     heatmap.set_xticklabels(daytick_labels, rotation=45)
 
     title = "Average Error Heatmap for Camps and Temples Over Time"
     if subtitle:
         title += f"\n{subtitle}"
-    plt.title(title)
+    heatmap.set_title(title)
 
-    plt.xlabel("Date")
-    plt.ylabel("Location")
-    plt.tight_layout()
-    plt.grid(False)
+    heatmap.set_xlabel("Date")
+    heatmap.set_ylabel("Location")
+    heatmap.grid(False)
 
-    path = _create_file_path(
-        "error_heatmap",
-        normalize=normalize,
-        show_values=show_values,
-        subtitle=subtitle,
-        results_dir=results_dir,
-    )
+    path = _error_heatmap_file_path(normalize, show_values, subtitle, results_dir)
 
     if show_plot:
         plt.show()
     else:
-        plt.savefig(path, dpi=300)
-        plt.close()
+        save_figure(fig, path, dpi=dpi)
+        if owns_fig:
+            plt.close(fig)
 
 
+@plot_cache(_displacement_file_path)
+@mpl.rc_context(_RENDER_RC)
 def displacement_over_time(
     days: list,
     refugee_series: list,
@@ -132,6 +446,7 @@ def displacement_over_time(
     show_plot: bool = False,
     results_dir: str = "plots",
     name: str = None,
+    fig=None,
 ) -> None:
     """
     Plot the average number of displaced individuals over time.
@@ -147,32 +462,40 @@ def displacement_over_time(
     - show_plot (bool): Whether to display the plot immediately. Default is False.
     - results_dir (str): Directory to save the plot PNG file. Default is "plots".
     - name (str): Name for the plot file. If None, a default name will be generated.
+    - fig (matplotlib.figure.Figure): Figure to draw on, cleared first so one figure can be
+      reused across calls. A new figure is created and closed when None. Default is None.
 
     Returns:
     ---------
     - None: Displays the plot and saves it as a PNG file.
     """
-    plt.figure(figsize=(10, 5))
-    ax = plt.gca()
-
-    plots = len(refugee_series)
-
-    for series, std, label in zip(refugee_series, refugee_std_series, series_labels):
-        data = np.array(series)
+    fig, owns_fig = _prepare_figure(fig, figsize=(10, 5), layout="constrained")
+    ax = fig.add_subplot()
 
-        max_val = data.max()
-        if normalize and max_val != 0:
-            data = data / max_val
+    data = np.asarray(refugee_series, dtype=np.float64)
+    if normalize:
+        max_vals = data.max(axis=1, keepdims=True)
+        max_vals[max_vals == 0] = 1
+        data = data / max_vals
+
+    # Series without a standard deviation are drawn without a band
+    has_std = [std is not None for std in refugee_std_series]
+    std = np.asarray(
+        [np.zeros(data.shape[1]) if s is None else s for s in refugee_std_series],
+        dtype=np.float64,
+    )
+    lower = data - std
+    upper = data + std
 
-        if std is not None:
-            std = np.array(std)
+    for i, (label, band) in enumerate(zip(series_labels, has_std)):
+        if band:
             ax.fill_between(
                 days,
-                data - std,
-                data + std,
+                lower[i],
+                upper[i],
                 alpha=0.2,
             )
-        ax.plot(days, data, label=label)
+        ax.plot(days, data[i], label=label)
 
     ax.set_xticks(np.arange(len(daytick_labels)))
     ax.set_xticklabels(daytick_labels, rotation=45, ha="right")
@@ -185,20 +508,19 @@ def displacement_over_time(
     )
 
     ax.legend()
-    plt.tight_layout()
 
     if show_plot:
         plt.show()
     else:
-        plt.savefig(
-            f"{results_dir}/displacement_over_time_{plots}.png"
-            if not name
-            else f"{results_dir}/displacement_over_time_{name}.png",
-            dpi=300,
+        save_figure(
+            fig, _displacement_file_path(refugee_series, name, results_dir), dpi=300
         )
-        plt.close()
+        if owns_fig:
+            plt.close(fig)
 
 
+@plot_cache(_camp_file_path)
+@mpl.rc_context(_RENDER_RC)
 def camp_displacement(
     days: list,
     dfs: list,
@@ -208,6 +530,7 @@ def camp_displacement(
     is_camp: bool = True,
     show_plot: bool = False,
     results_dir: str = "plots",
+    fig=None,
 ) -> None:
     """
     Plot the average number of displaced individuals per camp over time.
@@ -222,50 +545,57 @@ def camp_displacement(
     - is_camp (bool): Whether to plot per camp or not. Default is True.
     - show_plot (bool): Whether to display the plot immediately. Default is False.
     - results_dir (str): Directory to save the plot PNG file. Default is "plots".
+    - fig (matplotlib.figure.Figure): Figure to draw on, cleared first so one figure can be
+      reused across calls. A new figure is created and closed when None. Default is None.
     """
     nrows = 2
     ncols = math.ceil(N_camps / nrows)
-    fig, axes = plt.subplots(nrows=nrows, ncols=ncols, figsize=(20, 10))
+    fig, owns_fig = _prepare_figure(fig, figsize=(20, 10))
+    axes = fig.subplots(nrows=nrows, ncols=ncols, sharey=True)
     axes = axes.flatten() if nrows * ncols > 1 else [axes]
 
-    for i in range(N_camps):
-        ax = axes[i]
-        for df, label in zip(dfs, df_labels):
-            if is_camp:
-                camp_col = f"Camp_{i + 1} sim"
-                std_col = f"Camp_{i + 1} sim (std)"
-            else:
-                camp_col = f"Temple_{i + 1} sim"
-                std_col = f"Temple_{i + 1} sim (std)"
+    # Pull every location series out of the DataFrames as one block, shaped (days, N_camps)
+    prefix = "Camp" if is_camp else "Temple"
+    col_names_sim = [f"{prefix}_{i + 1} sim" for i in range(N_camps)]
+    col_names_std = [f"{col} (std)" for col in col_names_sim]
+    sim_arrs = [df[col_names_sim].to_numpy() for df in dfs]
+    std_arrs = [df[col_names_std].to_numpy() for df in dfs]
+    lower_arrs = [sim_arr - std_arr for sim_arr, std_arr in zip(sim_arrs, std_arrs)]
+    upper_arrs = [sim_arr + std_arr for sim_arr, std_arr in zip(sim_arrs, std_arrs)]
 
-            data = df[camp_col].values
-            std = df[std_col].values
+    day_ticks = np.arange(len(daytick_labels))
 
+    for i in range(N_camps):
+        ax = axes[i]
+        for sim_arr, lower_arr, upper_arr, label in zip(
+            sim_arrs, lower_arrs, upper_arrs, df_labels
+        ):
             ax.fill_between(
                 days,
-                data - std,
-                data + std,
+                lower_arr[:, i],
+                upper_arr[:, i],
                 alpha=0.2,
             )
-            ax.plot(days, data, label=label)
+            ax.plot(days, sim_arr[:, i], label=label)
 
-            ax.set_title(
-                f"Camp {i + 1}" if is_camp else f"Temple {i + 1}",
-                fontsize=15,
-                fontweight="bold",
-            )
+        ax.set_title(
+            f"{prefix} {i + 1}",
+            fontsize=15,
+            fontweight="bold",
+        )
 
-            ax.legend(
-                fontsize=10,
-                loc="lower right",
-                prop={"weight": "bold"},
-            )
+        ax.legend(
+            fontsize=10,
+            loc="lower right",
+            prop={"weight": "bold"},
+        )
 
-            ax.set_xticks(np.arange(len(daytick_labels)))
-            ax.set_xticklabels(daytick_labels, fontsize=10, rotation=45, ha="right")
+        ax.set_xticks(day_ticks)
+        ax.set_xticklabels(daytick_labels, fontsize=10, rotation=45, ha="right")
 
-            ax.set_yscale("log")
-            ax.set_ylim(10**-1, 3 * 10**3)  # Set y-axis limits for better visibility
+    # The y-axis is shared, so the scale and limits only need setting once
+    axes[0].set_yscale("log")
+    axes[0].set_ylim(10**-1, 3 * 10**3)  # Set y-axis limits for better visibility
 
     label_size = 25
     fig.supxlabel("Days", fontsize=label_size)
@@ -275,10 +605,62 @@ def camp_displacement(
         x=0.01,  # Adjust x position for better visibility
     )
 
-    plt.tight_layout()
+    fig.tight_layout()
 
     if show_plot:
         plt.show()
     else:
-        plt.savefig(f"{results_dir}/camp_over_time_{is_camp}.png", dpi=500)
-        plt.close()
+        save_figure(fig, _camp_file_path(is_camp, results_dir), dpi=500)
+        if owns_fig:
+            plt.close(fig)
+
+
+_RENDERERS = {
+    "error_matrix": error_matrix,
+    "displacement_over_time": displacement_over_time,
+    "camp_displacement": camp_displacement,
+}
+
+
+def _init_render_worker(rc_params: dict) -> None:
+    """
+    Set up a render worker with the Agg backend and the caller's rcParams.
+
+    Params:
+    ---------
+    - rc_params (dict): rcParams of the calling process, without the backend.
+    """
+    mpl.use("Agg")
+    mpl.rcParams.update(rc_params)
+
+
+def _render_one(job: tuple) -> None:
+    """
+    Render a single plot job in a worker process.
+
+    Params:
+    ---------
+    - job (tuple): Name of the plotting function and the keyword arguments to call it with.
+    """
+    kind, kwargs = job
+    _RENDERERS[kind](**kwargs)
+
+
+def render_all(jobs: list, max_workers: int = None) -> None:
+    """
+    Render independent plots in parallel, one figure per worker process.
+    Every job saves its PNG to disk; show_plot has no effect in a worker.
+
+    Params:
+    ---------
+    - jobs (list of tuple): (kind, kwargs) pairs, where kind is "error_matrix",
+      "displacement_over_time" or "camp_displacement" and kwargs are its arguments.
+    - max_workers (int): Number of worker processes. Default is None (one per CPU).
+    """
+    rc_params = {key: value for key, value in mpl.rcParams.items() if key != "backend"}
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=_init_render_worker,
+        initargs=(rc_params,),
+    ) as executor:
+        list(executor.map(_render_one, jobs))
@@ -2,6 +2,8 @@ import matplotlib.pyplot as plt
 import pandas as pd
 from matplotlib.ticker import MaxNLocator
 
+from script.figure_io import save_figure
+
 
 def plot_water_level(
     df: pd.DataFrame,
@@ -36,12 +38,16 @@ def plot_water_level(
         "The DataFrame should contain the 'Water Level Classification' column."
     )
 
-    fig, ax1 = plt.subplots(figsize=(FIG_SIZE))
+    days = df["Day"].to_numpy()
+    water_level = df["Water level at (12:30) hr (cm)"].to_numpy()
+    classification = df["Water Level Classification"].to_numpy()
+
+    fig, ax1 = plt.subplots(figsize=(FIG_SIZE), layout="constrained")
 
     # Water Level
     ax1.plot(
-        df["Day"],
-        df["Water level at (12:30) hr (cm)"],
+        days,
+        water_level,
         label="Water Level (cm)",
         color="b",
     )
@@ -61,8 +67,8 @@ def plot_water_level(
     # Classification
     ax2 = ax1.twinx()
     ax2.plot(
-        df["Day"],
-        df["Water Level Classification"],
+        days,
+        classification,
         label="Water Level Classification",
         linestyle=":",
         color="r",
@@ -72,9 +78,10 @@ def plot_water_level(
     ax2.set_ylim(-1, x + 1)
     ax2.yaxis.set_major_locator(MaxNLocator(integer=True))
 
-    fig.tight_layout()
     plt.title(title)
     fig.legend(loc="upper right", bbox_to_anchor=(0.9, 0.9))
 
-    plt.savefig("plots/water_level_plot.png", dpi=FIG_DPI, bbox_inches="tight")
+    # The tight bbox widens the canvas to fit titles wider than the figure,
+    # which constrained layout cannot do
+    save_figure(fig, "plots/water_level_plot.png", dpi=FIG_DPI, bbox_inches="tight")
     plt.show()
@@ -1,11 +1,64 @@
 import os
 import re
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
 from src.get_files import get_locations
 
+COORD_PATTERN = r"[-+]?\d*\.\d+|\d+"
+POINT_PATTERN = rf"({COORD_PATTERN})\s+({COORD_PATTERN})"
+POINT_RE = re.compile(POINT_PATTERN)
+LOCATION_SUFFIX_RE = re.compile(r"_\d+$")
+SOURCE_DATA_TEMPLATE = "2024-09-08,{}\n2024-09-14,{}\n2024-09-30,{}\n"
+LOCATION_CLASSES = ("camp", "temple", "flood_zone", "town")
+
+
+def classify_locations(locations_list: list) -> dict:
+    """
+    Classify the locations by the type that appears in their name.
+
+    Params
+    ------
+    - locations_list (list): The list of location names.
+
+    Returns
+    -------
+    - classes (dict): Maps each of "camp", "temple", "flood_zone" and "town" to a boolean
+      array marking the locations whose lower-cased name contains it.
+    """
+    names = np.char.lower(np.asarray(locations_list, dtype=str))
+    return {cls: np.char.find(names, cls) >= 0 for cls in LOCATION_CLASSES}
+
+
+def _write_numeric_csv(df: pd.DataFrame, path: str) -> None:
+    """
+    Write a numeric DataFrame to CSV with the pyarrow writer, in the same format as pandas.
+    Floats are written in their shortest repr ("0.0", "0.1") and missing values as empty
+    cells. The header is left unquoted, so a column name that would need quoting raises.
+
+    Params
+    ------
+    - df (pd.DataFrame): The DataFrame to write, with numeric columns only.
+    - path (str): The path of the CSV file.
+    """
+    columns = []
+    for _, column in df.items():
+        values = column.to_numpy()
+        if values.dtype.kind == "f":
+            # pyarrow drops the ".0" of whole floats, numpy's str matches pandas instead
+            values = pa.array(values.astype(str), mask=np.isnan(values))
+        columns.append(values)
+    table = pa.table(columns, names=[str(name) for name in df.columns])
+    pacsv.write_csv(
+        table,
+        path,
+        pacsv.WriteOptions(quoting_header="none", quoting_style="none"),
+    )
+
 
 def extract_coords(point_str: str) -> tuple:
     """
@@ -19,8 +72,8 @@ def extract_coords(point_str: str) -> tuple:
     -------
     - coords (tuple): The latitude and longitude coordinates
     """
-    coords = re.findall(r"[-+]?\d*\.\d+|\d+", point_str)
-    return float(coords[0]), float(coords[1])
+    coords = POINT_RE.search(point_str)
+    return float(coords.group(1)), float(coords.group(2))
 
 
 def append_coords(df) -> pd.DataFrame:
@@ -37,9 +90,8 @@ def append_coords(df) -> pd.DataFrame:
     -------
     - df (pd.DataFrame): The DataFrame with the latitude and longitude columns appended.
     """
-    df[["longitude", "latitude"]] = df["WKT"].apply(
-        lambda x: pd.Series(extract_coords(x))
-    )
+    coords = df["WKT"].str.extract(POINT_PATTERN, expand=True)
+    df[["longitude", "latitude"]] = coords.astype(np.float64).to_numpy()
     df.drop(columns=["WKT"], inplace=True)
     return df
 
@@ -61,30 +113,21 @@ def create_location_file(
     - region (str): The region of the location. Default is "Toungoo".
     - country (str): The country of the location. Default is "Myanmar".
     """
+    names = location_df["name"]
+    location_type = [LOCATION_SUFFIX_RE.sub("", name).lower() for name in names]
     df = pd.DataFrame(
-        columns=[
-            "#name",
-            "region",
-            "country",
-            "latitude",
-            "longitude",
-            "location_type",
-            "conflict_period",
-            "population",
-        ]
-    )
-
-    df = df.assign(
-        **{
-            "#name": location_df["name"],
+        {
+            "#name": names.to_numpy(),
             "region": region,
             "country": country,
-            "latitude": location_df["latitude"],
-            "longitude": location_df["longitude"],
-        }
+            "latitude": location_df["latitude"].to_numpy(),
+            "longitude": location_df["longitude"].to_numpy(),
+            "location_type": location_type,
+            "conflict_period": np.nan,
+            "population": np.nan,
+        },
+        index=location_df.index,
     )
-
-    df["location_type"] = df["#name"].str.lower().str.replace(r"_\d+$", "", regex=True)
     df.sort_values(by="#name", inplace=True)
     return df
 
@@ -107,34 +150,31 @@ def create_flood_level_csv(df: pd.DataFrame, PATH: str) -> pd.DataFrame:
     - flood_level_df (pd.DataFrame): The DataFrame with the flood level data.
     """
     locations_df = get_locations(PATH)
-    locations_list = locations_df["#name"].tolist()
+    locations = locations_df["#name"].to_numpy()
 
     assert "Date" in df.columns, "Date column is missing in the DataFrame"
     assert "Water Level Classification" in df.columns, (
         "Water Level Classification column is missing in the DataFrame"
     )
 
-    days = df["Date"].tolist()
-    day_list = np.arange(len(days))
-    flood_level = df["Water Level Classification"].tolist()
-    flood_level_df = pd.DataFrame(columns=["#Day"] + locations_list)
-
-    flood_level_df["#Day"] = day_list
-
-    for i in range(len(locations_list)):
-        location = locations_list[i].lower()
-
-        if "temple" in location:
-            adjusted_level = [0] * len(day_list)
-        elif "camp" in location:
-            adjusted_level = [max(0, level - 2) for level in flood_level]
-        elif "town" in location:
-            adjusted_level = [max(0, level - 1) for level in flood_level]
-        else:
-            adjusted_level = flood_level
+    day_list = np.arange(len(df))
+    flood_level = df["Water Level Classification"].to_numpy()[:, None]
+
+    # Temples are never flooded, camps and towns are offset by two and one levels
+    classes = classify_locations(locations)
+    adjusted_level = np.select(
+        [classes["temple"], classes["camp"], classes["town"]],
+        [
+            np.zeros_like(flood_level),
+            np.maximum(0, flood_level - 2),
+            np.maximum(0, flood_level - 1),
+        ],
+        flood_level,
+    )
 
-        flood_level_df[locations_list[i]] = adjusted_level
-    flood_level_df.to_csv(f"{PATH}input_csv/flood_level.csv", index=False)
+    flood_level_df = pd.DataFrame(adjusted_level, columns=locations)
+    flood_level_df.insert(0, "#Day", day_list)
+    _write_numeric_csv(flood_level_df, f"{PATH}input_csv/flood_level.csv")
     return flood_level_df
 
 
@@ -158,12 +198,14 @@ def create_floodawareness_csv(flood_awareness: np.ndarray, PATH: str) -> pd.Data
     locations_df = get_locations(PATH)
     locations_list = locations_df["#name"].tolist()
 
-    flood_awareness_df = pd.DataFrame(columns=["floodawareness"] + locations_list)
-    for col in flood_awareness_df.columns:
-        flood_awareness_df.loc[:, col] = flood_awareness
+    columns = ["floodawareness"] + locations_list
+    flood_awareness_df = pd.DataFrame(
+        np.repeat(flood_awareness.reshape(-1, 1), len(columns), axis=1),
+        columns=columns,
+    )
 
-    flood_awareness_df.to_csv(
-        f"{PATH}input_csv/demographics_floodawareness.csv", index=False
+    _write_numeric_csv(
+        flood_awareness_df, f"{PATH}input_csv/demographics_floodawareness.csv"
     )
     return flood_awareness_df
 
@@ -191,23 +233,21 @@ def create_source_data_files(
     """
     locations_df = get_locations(PATH)
     locations_list = locations_df["#name"].tolist()
-
-    (
-        camp_locations,
-        temple_locations,
-        floodzone_locations,
-        displacement_camp,
-        displacement_temple,
-        floodzone_population,
-    ) = _create_camp_and_floodzone_locations(
-        locations_list,
-        displacement,
-        fraction_displaced_camp,
-        population,
+    classes = classify_locations(locations_list)
+
+    *_, displacement_camp, displacement_temple, floodzone_population = (
+        _create_camp_and_floodzone_locations(
+            locations_list,
+            classes,
+            displacement,
+            fraction_displaced_camp,
+            population,
+        )
     )
 
     _create_source_data_files_for_locations(
-        np.concatenate((camp_locations, temple_locations)),
+        locations_list,
+        classes,
         displacement_camp,
         displacement_temple,
         floodzone_population,
@@ -220,6 +260,7 @@ def create_source_data_files(
 
 def _create_camp_and_floodzone_locations(
     locations_list: list,
+    classes: dict,
     displacement: int,
     fraction_displaced_camp: float,
     population: int,
@@ -230,25 +271,15 @@ def _create_camp_and_floodzone_locations(
     Params
     ------
     - locations_list (list): The list of locations to process.
+    - classes (dict): The location classes, as returned by classify_locations.
     - displacement (int): The number of people displaced to camps.
     - fraction_displaced_camp (float): The fraction of people displaced to camps.
     - population (int): The total population in the area.
     """
-    camp_locations = []
-    temple_locations = []
-    floodzone_locations = []
-
-    for location in locations_list:
-        lower_location = location.lower()
-
-        if "camp" in lower_location:
-            camp_locations.append(location)
-
-        if "temple" in lower_location:
-            temple_locations.append(location)
-
-        if "flood_zone" in lower_location:
-            floodzone_locations.append(location)
+    names = np.asarray(locations_list)
+    camp_locations = names[classes["camp"]].tolist()
+    temple_locations = names[classes["temple"]].tolist()
+    floodzone_locations = names[classes["flood_zone"]].tolist()
 
     displacement_camp = int(
         (displacement * fraction_displaced_camp) / len(camp_locations)
@@ -271,54 +302,75 @@ def _create_camp_and_floodzone_locations(
     )
 
 
+def _write_text(path: str, text: str) -> None:
+    """
+    Write the text to the given path, replacing any existing file.
+    Lines end in "\n" on every platform, like the other files in source_data.
+
+    Params
+    ------
+    - path (str): The path of the file to write.
+    - text (str): The content of the file.
+    """
+    with open(path, "w", newline="\n") as f:
+        f.write(text)
+
+
 def _create_source_data_files_for_locations(
     locations_list: list,
+    classes: dict,
     displacement_camp: int,
     displacement_temple: int,
     floodzone_population: int,
     fraction_stays_in_camp: float,
     flood_displacement: bool,
     PATH: str,
+    max_workers: int = 16,
 ) -> None:
     """
     Create source data files for the given locations.
 
     Params
     ------
-    - locations_list (list): The list of locations to create source data files for.
+    - locations_list (list): The list of locations; files are created for camps and temples.
+    - classes (dict): The location classes, as returned by classify_locations.
     - displacement_camp (int): The number of people displaced to camps.
     - displacement_temple (int): The number of people displaced to temples.
     - floodzone_population (int): The population in the flood zone.
     - fraction_stays_in_camp (float): The fraction of people who stay in the camps.
     - flood_displacement (bool): Whether to include flood displacement data.
     - PATH (str): The path to save the source data files.
+    - max_workers (int): The number of threads used to write the files. Default is 16.
     """
-    for location in locations_list:
-        template_df = pd.DataFrame(
-            columns=[["#Day", "Displacement"]],
-            data=[["2024-09-08", 0], ["2024-09-14", 0], ["2024-09-30", 0]],
+    is_camp = classes["camp"]
+    is_temple = classes["temple"]
+    is_floodzone = classes["flood_zone"]
+
+    files = {}
+    for i in np.flatnonzero(is_camp | is_temple):
+        displacements = [0, 0, 0]
+
+        if is_camp[i]:
+            displacements[1] = displacement_camp
+            displacements[2] = int(displacement_camp * fraction_stays_in_camp)
+
+        if is_temple[i]:
+            displacements[1] = displacement_temple
+            displacements[2] = int(displacement_temple * fraction_stays_in_camp)
+
+        if is_floodzone[i] and flood_displacement:
+            displacements[0] = floodzone_population
+            displacements[1] = int(floodzone_population * 0.4)
+            displacements[2] = int(floodzone_population * 0.1)
+
+        # Three rows per file, so they are formatted directly instead of via to_csv
+        files[f"{PATH}source_data/{locations_list[i]}.csv"] = (
+            SOURCE_DATA_TEMPLATE.format(*displacements)
         )
 
-        if "camp" in location.lower():
-            template_df.loc[1, "Displacement"] = displacement_camp
-            template_df.loc[2, "Displacement"] = int(
-                displacement_camp * fraction_stays_in_camp
-            )
-
-        if "temple" in location.lower():
-            template_df.loc[1, "Displacement"] = displacement_temple
-            template_df.loc[2, "Displacement"] = int(
-                displacement_temple * fraction_stays_in_camp
-            )
-
-        if "flood_zones" in location.lower() and flood_displacement:
-            template_df.loc[0, "Displacement"] = floodzone_population
-            template_df.loc[1, "Displacement"] = int(floodzone_population * 0.4)
-            template_df.loc[2, "Displacement"] = int(floodzone_population * 0.1)
-
-        template_df.to_csv(
-            f"{PATH}source_data/{location}.csv", index=False, header=False
-        )
+    # The files are independent and the work is I/O-bound, so write them in parallel
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(_write_text, files.keys(), files.values()))
 
 
 def _create_refugee_csv(
@@ -339,7 +391,9 @@ def _create_refugee_csv(
         columns=["Date", "Refugee_numbers"],
         data=[[f"2024-09-{day:02d}", refugee_numbers]],
     )
-    refugee_df.to_csv(f"{PATH}source_data/refugees.csv", index=False, header=True)
+    refugee_df.to_csv(
+        f"{PATH}source_data/refugees.csv", index=False, header=True, lineterminator="\n"
+    )
 
 
 def create_data_layout(PATH: str) -> None:
@@ -352,13 +406,12 @@ def create_data_layout(PATH: str) -> None:
     """
     locations_df = get_locations(PATH)
 
-    data_layout_df = pd.DataFrame(columns=["total", "refugees.csv"])
-    data_layout_df["total"] = locations_df["#name"].tolist()
-    data_layout_df["refugees.csv"] = [
-        location + ".csv" for location in locations_df["#name"].tolist()
-    ]
+    names = locations_df["#name"]
+    data_layout_df = pd.DataFrame({"total": names, "refugees.csv": names + ".csv"})
 
-    data_layout_df.to_csv(f"{PATH}source_data/data_layout.csv", index=False)
+    data_layout_df.to_csv(
+        f"{PATH}source_data/data_layout.csv", index=False, lineterminator="\n"
+    )
 
 
 def copy_settings(PATH: str) -> None:
@@ -376,9 +429,12 @@ def copy_settings(PATH: str) -> None:
     original_path = "/".join(PATH_list[:-1]) + "/"
     copy_path = os.path.join(base_path + config_dir + "_copy")
 
-    i = 1
-    while os.path.exists(f"{copy_path}{i}/"):
-        i += 1
+    copy_re = re.compile(rf"{re.escape(config_dir)}_copy(\d+)")
+    with os.scandir(base_path) as entries:
+        suffixes = [
+            int(m.group(1)) for entry in entries if (m := copy_re.fullmatch(entry.name))
+        ]
+    i = max(suffixes, default=0) + 1
 
     copy_path = f"{copy_path}{i}/"
-    shutil.copytree(original_path, copy_path)
+    shutil.copytree(original_path, copy_path, copy_function=shutil.copy)
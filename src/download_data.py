@@ -1,13 +1,31 @@
-from datetime import datetime, timedelta
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from typing import List, Tuple
 
+import pandas as pd
 import requests
-from joblib import Parallel, delayed
 
 # start_date = datetime(2024, 9, 8)
 # end_date = datetime(2024, 9, 30)
 # pages = [1, 2]
 
+_thread_local = threading.local()
+
+
+def _get_session() -> requests.Session:
+    """
+    Get the HTTP session of the current thread, so connections are kept alive across downloads.
+
+    Returns
+    -------
+    - session (requests.Session): The session of the current thread.
+    """
+    if not hasattr(_thread_local, "session"):
+        _thread_local.session = requests.Session()
+    return _thread_local.session
+
 
 def _download_image(url: str, filename: str) -> None:
     """
@@ -19,14 +37,14 @@ def _download_image(url: str, filename: str) -> None:
     - filename (str): The name of the file to save the image
 
     """
-    response = requests.get(url, stream=True)
-    if response.status_code == 200:
-        with open(filename, "wb") as file:
-            for chunk in response.iter_content(1024):
-                file.write(chunk)
-        print(f"✅ Downloaded: {filename}")
-    else:
-        print(f"❌ Failed: {url}")
+    with _get_session().get(url, stream=True) as response:
+        if response.status_code == 200:
+            with open(filename, "wb") as file:
+                for chunk in response.iter_content(65536):
+                    file.write(chunk)
+            print(f"✅ Downloaded: {filename}")
+        else:
+            print(f"❌ Failed: {url}")
 
 
 def generate_download_tasks(
@@ -46,30 +64,35 @@ def generate_download_tasks(
     -------
     - List[Tuple[str, str]]: The download tasks to execute.
     """
-    tasks = []
-    current_date = start_date
-    while current_date <= end_date:
-        date_str = current_date.strftime(
-            "%-d-%-m-%Y"
-        )  # Format: 8-9-2024 (use %#d-%#m-%Y on Windows)
-        for page in pages:
-            for url_format in url_formats:
-                image_url = url_format.format(date_str, page)
-                filename = f"Waterlevel_Forecast_{date_str}_Page_{page}.png"
-                tasks.append((image_url, filename))
-        current_date += timedelta(days=1)
+    # Format: 8-9-2024, built from the date fields so it also works on Windows
+    days = pd.date_range(start_date, end_date, freq="D")
+    dates = [
+        f"{day}-{month}-{year}"
+        for day, month, year in zip(days.day, days.month, days.year)
+    ]
+    tasks = [
+        (
+            url_format.format(date_str, page),
+            f"Waterlevel_Forecast_{date_str}_Page_{page}.png",
+        )
+        for date_str, page, url_format in itertools.product(dates, pages, url_formats)
+    ]
     return tasks
 
 
-def download_images(start_date: datetime, end_date: datetime, pages: List[int]):
+def download_images(
+    start_date: datetime, end_date: datetime, pages: List[int], max_workers: int = 32
+):
     """
     Download the images for the given date range and pages.
+    The downloads are network bound, so they run on a thread pool that reuses connections.
 
     Params
     ------
     - start_date (datetime): The start date of the range.
     - end_date (datetime): The end date of the range.
     - pages (List[int]): The pages to download.
+    - max_workers (int): The number of concurrent downloads. Default is 32.
     """
     url_formats = [
         "https://www.moezala.gov.mm/sites/default/files/__MACOSX/Daily%20Waterlevel%20Forecast({})-E_Page_{}.jpg",
@@ -78,6 +101,5 @@ def download_images(start_date: datetime, end_date: datetime, pages: List[int]):
     ]
 
     tasks = generate_download_tasks(start_date, end_date, pages, url_formats)
-    Parallel(n_jobs=-1)(
-        delayed(_download_image)(url, filename) for url, filename in tasks
-    )
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(lambda task: _download_image(*task), tasks))
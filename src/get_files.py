@@ -1,9 +1,64 @@
+import functools
+import os
+
+import numpy as np
 import pandas as pd
 
 
+@functools.lru_cache(maxsize=8)
+def _read_locations(path: str, mtime: float) -> pd.DataFrame:
+    """
+    Parse a locations CSV file, cached per path and modification time.
+    Only the 8 most recently used files are kept, so rewritten files do not pile up.
+
+    Params
+    ------
+    - path (str): The path to the locations CSV file.
+    - mtime (float): The modification time of the file, used as cache key.
+
+    Returns
+    -------
+    - location_df (pd.DataFrame): The parsed location data.
+    """
+    return pd.read_csv(
+        path,
+        engine="pyarrow",
+        dtype={"latitude": np.float64, "longitude": np.float64},
+    )
+
+
+@functools.lru_cache(maxsize=8)
+def _read_routes(path: str, mtime: float) -> pd.DataFrame:
+    """
+    Parse a routes CSV file, cached per path and modification time.
+    Only the 8 most recently used files are kept, so rewritten files do not pile up.
+
+    Params
+    ------
+    - path (str): The path to the routes CSV file.
+    - mtime (float): The modification time of the file, used as cache key.
+
+    Returns
+    -------
+    - routes_df (pd.DataFrame): The parsed route data.
+    """
+    return pd.read_csv(
+        path,
+        engine="pyarrow",
+        header=None,
+        names=["location_1", "location_2", "distance (km)"],
+        dtype={
+            "location_1": "string",
+            "location_2": "string",
+            "distance (km)": np.float32,
+        },
+    )
+
+
 def get_locations(PATH: str) -> pd.DataFrame:
     """
     Get the location data from the CSV file.
+    The file is only parsed again when it has changed since the last call.
 
     Params
     ------
@@ -13,13 +68,15 @@ def get_locations(PATH: str) -> pd.DataFrame:
     -------
     - location_df (pd.DataFrame): The DataFrame containing the location data.
     """
-    location_df = pd.read_csv(f"{PATH}input_csv/locations.csv")
+    path = f"{PATH}input_csv/locations.csv"
+    location_df = _read_locations(path, os.path.getmtime(path)).copy()
     return location_df
 
 
 def get_routes(PATH: str) -> pd.DataFrame:
     """
     Read the routes.csv file and return a pandas DataFrame
+    The file is only parsed again when it has changed since the last call.
 
     Params
     ------
@@ -29,9 +86,6 @@ def get_routes(PATH: str) -> pd.DataFrame:
     -------
     - pd.DataFrame: The edges DataFrame
     """
-    routes_df = pd.read_csv(
-        PATH + "input_csv/routes.csv",
-        header=None,
-        names=["location_1", "location_2", "distance (km)"],
-    )
+    path = PATH + "input_csv/routes.csv"
+    routes_df = _read_routes(path, os.path.getmtime(path)).copy()
     return routes_df
@@ -1,3 +1,6 @@
+import numpy as np
+
+
 def classify_water_level(level: int, min_level: int, max_level: int, x: int) -> int:
     """
     Classify the water level based on the given parameters.
@@ -17,3 +20,39 @@ def classify_water_level(level: int, min_level: int, max_level: int, x: int) ->
         return 0
     else:
         return round((level - min_level) / (max_level - min_level) * x)
+
+
+def classify_water_level_array(
+    levels: np.ndarray, min_level: int, max_level: int, x: int
+) -> np.ndarray:
+    """
+    Classify a whole array of water levels at once.
+    Gives the same classes as calling classify_water_level on every element, and raises
+    the same errors for NaN levels or when max_level equals min_level.
+
+    Params
+    ------
+    - levels (np.ndarray): The water levels to classify.
+    - min_level (int): The minimum water level.
+    - max_level (int): The maximum water level.
+    - x (int): The number of classes to classify the water level.
+
+    Returns
+    -------
+    - np.ndarray: The class of each water level.
+    """
+    levels = np.asarray(levels, dtype=np.float64)
+    # Fail where the scalar version does instead of casting NaN or inf to an integer
+    if np.isnan(levels).any():
+        raise ValueError("cannot convert float NaN to integer")
+    if np.isinf(levels).any():
+        raise OverflowError("cannot convert float infinity to integer")
+    above = levels >= min_level
+    if max_level == min_level and above.any():
+        raise ZeroDivisionError("max_level and min_level must differ")
+    classes = np.zeros(levels.shape, dtype=np.int64)
+    # np.rint rounds halves to even, like the built-in round
+    classes[above] = np.rint(
+        (levels[above] - min_level) / (max_level - min_level) * x
+    ).astype(np.int64)
+    return classes